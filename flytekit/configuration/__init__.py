@@ -17,6 +17,9 @@ Where can configuration come from?
   1. First, a file named ``flytekit.config`` in the Python interpreter's starting directory
   2. A file in ``~/.flyte/config`` in the home directory as detected by Python.
 
+  If the ``FLYTECTL_CONFIG`` environment variable points at a flytectl YAML config file, that file takes precedence
+  over both.
+
 How is configuration used?
 ^^^^^^^^^^^^^^^^^^^^^^^^^^
 
@@ -93,7 +96,14 @@ from docker_image import reference
 
 from flytekit.configuration import internal as _internal
 from flytekit.configuration.default_images import DefaultImages
-from flytekit.configuration.file import ConfigEntry, ConfigFile, get_config_file, read_file_if_exists, set_if_exists
+from flytekit.configuration.file import (
+    ConfigEntry,
+    ConfigFile,
+    get_config_file,
+    read_file_if_exists,
+    set_if_exists,
+    set_many_if_exists,
+)
 
 PROJECT_PLACEHOLDER = "{{ registration.project }}"
 DOMAIN_PLACEHOLDER = "{{ registration.domain }}"
@@ -344,21 +354,22 @@ class PlatformConfig(object):
         """
         config_file = get_config_file(config_file)
         kwargs = {}
-        kwargs = set_if_exists(kwargs, "insecure", _internal.Platform.INSECURE.read(config_file))
-        kwargs = set_if_exists(kwargs, "command", _internal.Credentials.COMMAND.read(config_file))
-        kwargs = set_if_exists(kwargs, "client_id", _internal.Credentials.CLIENT_ID.read(config_file))
-        kwargs = set_if_exists(
-            kwargs, "client_credentials_secret", _internal.Credentials.CLIENT_CREDENTIALS_SECRET.read(config_file)
-        )
+        entries = {
+            "insecure": _internal.Platform.INSECURE,
+            "command": _internal.Credentials.COMMAND,
+            "client_id": _internal.Credentials.CLIENT_ID,
+            "client_credentials_secret": _internal.Credentials.CLIENT_CREDENTIALS_SECRET,
+            "scopes": _internal.Credentials.SCOPES,
+            "auth_mode": _internal.Credentials.AUTH_MODE,
+            "endpoint": _internal.Platform.URL,
+        }
+        kwargs = set_many_if_exists(kwargs, zip(entries, ConfigEntry.read_many(entries.values(), config_file)))
 
         kwargs = set_if_exists(
             kwargs,
             "client_credentials_secret",
             read_file_if_exists(_internal.Credentials.CLIENT_CREDENTIALS_SECRET_LOCATION.read(config_file)),
         )
-        kwargs = set_if_exists(kwargs, "scopes", _internal.Credentials.SCOPES.read(config_file))
-        kwargs = set_if_exists(kwargs, "auth_mode", _internal.Credentials.AUTH_MODE.read(config_file))
-        kwargs = set_if_exists(kwargs, "endpoint", _internal.Platform.URL.read(config_file))
         return PlatformConfig(**kwargs)
 
     @classmethod
@@ -391,10 +402,13 @@ class StatsConfig(object):
         """
         config_file = get_config_file(config_file)
         kwargs = {}
-        kwargs = set_if_exists(kwargs, "host", _internal.StatsD.HOST.read(config_file))
-        kwargs = set_if_exists(kwargs, "port", _internal.StatsD.PORT.read(config_file))
-        kwargs = set_if_exists(kwargs, "disabled", _internal.StatsD.DISABLED.read(config_file))
-        kwargs = set_if_exists(kwargs, "disabled_tags", _internal.StatsD.DISABLE_TAGS.read(config_file))
+        entries = {
+            "host": _internal.StatsD.HOST,
+            "port": _internal.StatsD.PORT,
+            "disabled": _internal.StatsD.DISABLED,
+            "disabled_tags": _internal.StatsD.DISABLE_TAGS,
+        }
+        kwargs = set_many_if_exists(kwargs, zip(entries, ConfigEntry.read_many(entries.values(), config_file)))
         return StatsConfig(**kwargs)
 
 
@@ -421,9 +435,12 @@ class SecretsConfig(object):
         """
         config_file = get_config_file(config_file)
         kwargs = {}
-        kwargs = set_if_exists(kwargs, "env_prefix", _internal.Secrets.ENV_PREFIX.read(config_file))
-        kwargs = set_if_exists(kwargs, "default_dir", _internal.Secrets.DEFAULT_DIR.read(config_file))
-        kwargs = set_if_exists(kwargs, "file_prefix", _internal.Secrets.FILE_PREFIX.read(config_file))
+        entries = {
+            "env_prefix": _internal.Secrets.ENV_PREFIX,
+            "default_dir": _internal.Secrets.DEFAULT_DIR,
+            "file_prefix": _internal.Secrets.FILE_PREFIX,
+        }
+        kwargs = set_many_if_exists(kwargs, zip(entries, ConfigEntry.read_many(entries.values(), config_file)))
         return SecretsConfig(**kwargs)
 
 
@@ -449,12 +466,15 @@ class S3Config(object):
         """
         config_file = get_config_file(config_file)
         kwargs = {}
-        kwargs = set_if_exists(kwargs, "enable_debug", _internal.AWS.ENABLE_DEBUG.read(config_file))
-        kwargs = set_if_exists(kwargs, "endpoint", _internal.AWS.S3_ENDPOINT.read(config_file))
-        kwargs = set_if_exists(kwargs, "retries", _internal.AWS.RETRIES.read(config_file))
-        kwargs = set_if_exists(kwargs, "backoff", _internal.AWS.BACKOFF_SECONDS.read(config_file))
-        kwargs = set_if_exists(kwargs, "access_key_id", _internal.AWS.S3_ACCESS_KEY_ID.read(config_file))
-        kwargs = set_if_exists(kwargs, "secret_access_key", _internal.AWS.S3_SECRET_ACCESS_KEY.read(config_file))
+        entries = {
+            "enable_debug": _internal.AWS.ENABLE_DEBUG,
+            "endpoint": _internal.AWS.S3_ENDPOINT,
+            "retries": _internal.AWS.RETRIES,
+            "backoff": _internal.AWS.BACKOFF_SECONDS,
+            "access_key_id": _internal.AWS.S3_ACCESS_KEY_ID,
+            "secret_access_key": _internal.AWS.S3_SECRET_ACCESS_KEY,
+        }
+        kwargs = set_many_if_exists(kwargs, zip(entries, ConfigEntry.read_many(entries.values(), config_file)))
         return S3Config(**kwargs)
 
 
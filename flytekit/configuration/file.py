@@ -2,23 +2,33 @@ from __future__ import annotations
 
 import configparser
 import configparser as _configparser
+import copy
+import functools
+import operator
 import os
 import pathlib
+import sys
+import threading
 import typing
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from os import getenv
 from pathlib import Path
 
-import yaml
-
 from flytekit.exceptions import user as _user_exceptions
 from flytekit.loggers import logger
 
 # This is the env var that the flytectl sandbox instructions say to set
 FLYTECTL_CONFIG_ENV_VAR = "FLYTECTL_CONFIG"
 
+# Config entries are created in bulk at import time, give them slots where dataclasses support it
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+def _identity(v: typing.Any) -> typing.Any:
+    return v
+
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class LegacyConfigEntry(object):
     """
     Creates a record for the config entry. contains
@@ -31,6 +41,10 @@ class LegacyConfigEntry(object):
     section: str
     option: str
     type_: typing.Type = str
+    _env_key: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self._env_key = f"FLYTE_{self.section.upper()}_{self.option.upper()}"
 
     def read_from_env(self, transform: typing.Optional[typing.Callable] = None) -> typing.Optional[typing.Any]:
         """
@@ -38,8 +52,7 @@ class LegacyConfigEntry(object):
         ``FLYTE_{SECTION}_{OPTION}`` all upper cased. We will change this in the future.
         :return:
         """
-        env = f"FLYTE_{self.section.upper()}_{self.option.upper()}"
-        v = os.environ.get(env, None)
+        v = os.environ.get(self._env_key, None)
         if v is None:
             return None
         return transform(v) if transform else v
@@ -57,7 +70,7 @@ class LegacyConfigEntry(object):
         return None
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class YamlConfigEntry(object):
     """
     Creates a record for the config entry. contains
@@ -69,6 +82,15 @@ class YamlConfigEntry(object):
 
     switch: str
     config_value_type: typing.Type = str
+    _getter: typing.Callable[[typing.Mapping], typing.Any] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        keys = tuple(self.switch.split("."))  # flytectl switches are dot delimited
+        if len(keys) == 1:
+            self._getter = operator.itemgetter(keys[0])
+        else:
+            # reduce(getitem, keys, d) is d[k0][k1]...
+            self._getter = functools.partial(functools.reduce, operator.getitem, keys)
 
     def read_from_file(
         self, cfg: ConfigFile, transform: typing.Optional[typing.Callable] = None
@@ -84,9 +106,12 @@ class YamlConfigEntry(object):
         return None
 
 
+_FALSEY = frozenset({"false", "0", "off", "no", ""})
+
+
 def bool_transformer(config_val: typing.Any):
     if type(config_val) is str:
-        return True if config_val and not config_val.lower() in ["false", "0", "off", "no"] else False
+        return config_val.lower() not in _FALSEY
     else:
         return config_val
 
@@ -107,7 +132,7 @@ def int_transformer(config_val: typing.Any):
     return config_val
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class ConfigEntry(object):
     """
     A top level Config entry holder, that holds multiple different representations of the config.
@@ -118,6 +143,7 @@ class ConfigEntry(object):
     legacy: LegacyConfigEntry
     yaml_entry: typing.Optional[YamlConfigEntry] = None
     transform: typing.Optional[typing.Callable[[str], typing.Any]] = None
+    _effective_transform: typing.Callable[[typing.Any], typing.Any] = field(init=False, repr=False, compare=False)
 
     legacy_default_transforms = {
         bool: bool_transformer,
@@ -129,6 +155,7 @@ class ConfigEntry(object):
         if self.legacy:
             if not self.transform and self.legacy.type_ in ConfigEntry.legacy_default_transforms:
                 self.transform = ConfigEntry.legacy_default_transforms[self.legacy.type_]
+        self._effective_transform = self.transform or _identity
 
     def read(self, cfg: typing.Optional[ConfigFile] = None) -> typing.Optional[typing.Any]:
         """
@@ -142,23 +169,213 @@ class ConfigEntry(object):
         :param cfg:
         :return:
         """
-        from_env = self.legacy.read_from_env(self.transform)
-        if from_env is not None:
-            return from_env
+        return self._read(cfg, self.legacy.read_from_env())
+
+    @staticmethod
+    def read_many(
+        entries: typing.Iterable[ConfigEntry], cfg: typing.Optional[ConfigFile] = None
+    ) -> typing.List[typing.Optional[typing.Any]]:
+        """
+        Reads all the given config entries, in the same order and with the same precedence as :py:meth:`read`.
+        Useful when building a config object out of many entries at once.
+        """
+        env_get = os.environ.get
+        return [e._read(cfg, env_get(e.legacy._env_key)) for e in entries]
+
+    def _read(self, cfg: typing.Optional[ConfigFile], env_val: typing.Optional[str]) -> typing.Optional[typing.Any]:
+        if env_val is not None:
+            return self._effective_transform(env_val)
         if cfg and cfg.legacy_config:
-            return self.legacy.read_from_file(cfg, self.transform)
+            return self.legacy.read_from_file(cfg, self._effective_transform)
         if cfg and cfg.yaml_config and self.yaml_entry:
-            return self.yaml_entry.read_from_file(cfg, self.transform)
+            return self.yaml_entry.read_from_file(cfg, self._effective_transform)
 
         return None
 
 
+# Marks a keyword argument that was not passed, as None is a valid fallback
+_UNSET = object()
+
+
+class _LegacySection(typing.Mapping[str, str]):
+    """
+    Read-only view of the options of a section, looked up case insensitively like configparser's SectionProxy.
+    """
+
+    def __init__(self, name: str, options: typing.Dict[str, str]):
+        self.name = name
+        self._options = options
+
+    def __getitem__(self, option: str) -> str:
+        return self._options[option.lower()]
+
+    def __iter__(self) -> typing.Iterator[str]:
+        return iter(self._options)
+
+    def __len__(self) -> int:
+        return len(self._options)
+
+
+class _LegacyConfig(typing.Mapping[str, _LegacySection]):
+    """
+    A read-only stand-in for :py:class:`configparser.ConfigParser`, covering the simple INI files flytekit is
+    configured with. It is a mapping of section names to sections, including an empty ``DEFAULT`` section, and offers
+    the read methods of ConfigParser with the same arguments, return values and errors.
+    """
+
+    def __init__(self, sections: typing.Dict[str, typing.Dict[str, str]]):
+        self._sections = sections
+
+    @classmethod
+    def parse(cls, text: str) -> typing.Optional[_LegacyConfig]:
+        """
+        Parses ``section`` headers and ``option=value`` lines. Returns None if the text uses anything else
+        (multi-line values, ``:`` delimiters, interpolation, a DEFAULT section, duplicates or malformed lines),
+        in which case the caller should fall back to configparser.
+        """
+        sections: typing.Dict[str, typing.Dict[str, str]] = {}
+        options = None
+        for line in text.splitlines():
+            if not line or line.isspace() or line[0] in "#;":
+                continue
+            if line[0].isspace():
+                return None
+            line = line.rstrip()
+            if line[0] == "[":
+                name = line[1:-1]
+                if line[-1] != "]" or not name or "]" in name or name == "DEFAULT" or name in sections:
+                    return None
+                options = sections[name] = {}
+                continue
+            option, sep, value = line.partition("=")
+            option = option.rstrip().lower()
+            if options is None or not sep or not option or ":" in option or "%" in value or option in options:
+                return None
+            options[option] = value.strip()
+        return cls(sections)
+
+    def __getitem__(self, section: str) -> _LegacySection:
+        if section == _configparser.DEFAULTSECT:
+            return _LegacySection(section, {})
+        return _LegacySection(section, self._sections[section])
+
+    def __iter__(self) -> typing.Iterator[str]:
+        yield _configparser.DEFAULTSECT
+        yield from self._sections
+
+    def __len__(self) -> int:
+        return len(self._sections) + 1
+
+    def defaults(self) -> typing.Dict[str, str]:
+        return {}
+
+    def sections(self) -> typing.List[str]:
+        return list(self._sections)
+
+    def has_section(self, section: str) -> bool:
+        return section in self._sections
+
+    def options(self, section: str) -> typing.List[str]:
+        try:
+            return list(self._sections[section])
+        except KeyError:
+            raise _configparser.NoSectionError(section) from None
+
+    def has_option(self, section: str, option: str) -> bool:
+        return option.lower() in self._sections.get(section, {})
+
+    def get(
+        self,
+        section: str,
+        option: str,
+        *,
+        raw: bool = False,
+        vars: typing.Optional[typing.Mapping[str, str]] = None,
+        fallback: typing.Any = _UNSET,
+    ) -> typing.Any:
+        # raw is accepted for compatibility only, files using interpolation are parsed by configparser
+        try:
+            options = self._sections[section]
+        except KeyError:
+            if fallback is _UNSET:
+                raise _configparser.NoSectionError(section) from None
+            return fallback
+        option = option.lower()
+        if vars:
+            for k, v in vars.items():
+                if k.lower() == option:
+                    return v
+        try:
+            return options[option]
+        except KeyError:
+            if fallback is _UNSET:
+                raise _configparser.NoOptionError(option, section) from None
+            return fallback
+
+    def _get_conv(
+        self,
+        section: str,
+        option: str,
+        conv: typing.Callable[[str], typing.Any],
+        raw: bool,
+        vars: typing.Optional[typing.Mapping[str, str]],
+        fallback: typing.Any,
+    ) -> typing.Any:
+        try:
+            return conv(self.get(section, option, raw=raw, vars=vars))
+        except (_configparser.NoSectionError, _configparser.NoOptionError):
+            if fallback is _UNSET:
+                raise
+            return fallback
+
+    def getint(self, section: str, option: str, *, raw=False, vars=None, fallback=_UNSET) -> int:
+        return self._get_conv(section, option, int, raw, vars, fallback)
+
+    def getfloat(self, section: str, option: str, *, raw=False, vars=None, fallback=_UNSET) -> float:
+        return self._get_conv(section, option, float, raw, vars, fallback)
+
+    def getboolean(self, section: str, option: str, *, raw=False, vars=None, fallback=_UNSET) -> bool:
+        return self._get_conv(section, option, _legacy_boolean, raw, vars, fallback)
+
+    def items(self, section: typing.Any = _UNSET, raw: bool = False, vars: typing.Optional[typing.Mapping] = None):
+        """
+        Like ConfigParser.items: the (name, section) pairs without arguments, or the (option, value) pairs of a
+        section.
+        """
+        if section is _UNSET:
+            return super().items()
+        try:
+            d = dict(self._sections[section])
+        except KeyError:
+            raise _configparser.NoSectionError(section) from None
+        if vars:
+            d.update((k.lower(), v) for k, v in vars.items())
+        return list(d.items())
+
+
+def _legacy_boolean(v: str) -> bool:
+    try:
+        return _configparser.ConfigParser.BOOLEAN_STATES[v.lower()]
+    except KeyError:
+        raise ValueError(f"Not a boolean: {v}") from None
+
+
+# Converters for the raw string value of a LegacyConfigEntry by expected type, anything not listed is kept a string.
+# They build a new value on every read, so callers never share (and can't mutate) each other's results.
+_LEGACY_READERS: typing.Dict[typing.Type, typing.Callable[[str], typing.Any]] = {
+    bool: _legacy_boolean,
+    int: int,
+    list: lambda v: v.split(","),
+}
+
+
 class ConfigFile(object):
-    def __init__(self, location: str):
+    def __init__(self, location: str, _stat: typing.Optional[os.stat_result] = None):
         """
-        Load the config from this location
+        Load the config from this location. ``_stat`` is the stat result of the location if the caller already has it.
         """
         self._location = location
+        self._stat = _stat if _stat is not None else _stat_or_none(Path(location))
         if location.endswith("yaml"):
             self._legacy_config = None
             self._yaml_config = self._read_yaml_config(location)
@@ -168,17 +385,30 @@ class ConfigFile(object):
 
     @staticmethod
     def _read_yaml_config(location: str) -> typing.Optional[typing.Dict[str, typing.Any]]:
-        with open(location, "r") as fh:
-            try:
-                yaml_contents = yaml.safe_load(fh)
-                return yaml_contents
-            except yaml.YAMLError as exc:
-                logger.warning(f"Error {exc} reading yaml config file at {location}, ignoring...")
-                return None
+        # yaml is only imported when a YAML config is used, to keep it off the import path of flytekit
+        import yaml
 
-    def _read_legacy_config(self, location: str) -> _configparser.ConfigParser:
-        c = _configparser.ConfigParser()
-        c.read(self._location)
+        with open(location, "rb") as fh:
+            data = fh.read()
+        try:
+            # Use the libyaml backed loader when PyYAML was built with it
+            yaml_contents = yaml.load(data, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+            return yaml_contents
+        except yaml.YAMLError as exc:
+            logger.warning(f"Error {exc} reading yaml config file at {location}, ignoring...")
+            return None
+
+    def _read_legacy_config(self, location: str) -> typing.Union[_LegacyConfig, _configparser.ConfigParser]:
+        try:
+            with open(location) as fh:
+                text = fh.read()
+        except OSError:
+            # Just like ConfigParser.read, a missing file results in an empty config
+            text = ""
+        c = _LegacyConfig.parse(text)
+        if c is None:
+            c = _configparser.ConfigParser()
+            c.read_string(text, source=location)
         if c.has_section("internal"):
             raise _user_exceptions.FlyteAssertion(
                 "The config file '{}' cannot contain a section for internal " "only configurations.".format(location)
@@ -186,81 +416,152 @@ class ConfigFile(object):
         return c
 
     def _get_from_legacy(self, c: LegacyConfigEntry) -> typing.Any:
-        if issubclass(c.type_, bool):
-            return self._legacy_config.getboolean(c.section, c.option)
-
-        if issubclass(c.type_, int):
-            return self._legacy_config.getint(c.section, c.option)
-
-        if issubclass(c.type_, list):
-            v = self._legacy_config.get(c.section, c.option)
-            return v.split(",")
-
-        return self._legacy_config.get(c.section, c.option)
+        v = self._legacy_config.get(c.section, c.option)
+        reader = _LEGACY_READERS.get(c.type_)
+        return reader(v) if reader else v
 
     def _get_from_yaml(self, c: YamlConfigEntry) -> typing.Any:
-        keys = c.switch.split(".")  # flytectl switches are dot delimited
-        d = self.yaml_config
         try:
-            for k in keys:
-                d = d[k]
-            return d
+            d = c._getter(self._yaml_config)
         except KeyError:
             logger.debug(f"Switch {c.switch} could not be found in yaml config")
             return None
+        # The document is shared by every holder of this ConfigFile, callers get their own copy of lists and dicts
+        return copy.deepcopy(d) if isinstance(d, (list, dict)) else d
 
     def get(self, c: typing.Union[LegacyConfigEntry, YamlConfigEntry]) -> typing.Any:
         if isinstance(c, LegacyConfigEntry):
             return self._get_from_legacy(c)
-        if isinstance(c, YamlConfigEntry) and self.yaml_config:
+        if isinstance(c, YamlConfigEntry) and self._yaml_config:
             return self._get_from_yaml(c)
         raise NotImplementedError("Support for other config types besides .ini / .config files not yet supported")
 
+    def is_stale(self) -> bool:
+        """
+        Returns True if the file was modified, created or removed since it was loaded
+        """
+        return not self._matches(_stat_or_none(Path(self._location)))
+
+    def _matches(self, st: typing.Optional[os.stat_result]) -> bool:
+        if st is None or self._stat is None:
+            return st is self._stat
+        return (st.st_mtime_ns, st.st_size) == (self._stat.st_mtime_ns, self._stat.st_size)
+
     @property
-    def legacy_config(self) -> _configparser.ConfigParser:
+    def legacy_config(self) -> typing.Union[_LegacyConfig, _configparser.ConfigParser]:
+        """
+        The parsed INI config. ConfigFiles are shared by :py:func:`get_config_file`, so this must not be modified.
+        It is read-only unless the file needed the configparser fallback.
+        """
         return self._legacy_config
 
     @property
-    def yaml_config(self) -> typing.Dict[str, Any]:
+    def yaml_config(self) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        """
+        The parsed YAML config. ConfigFiles are shared by :py:func:`get_config_file`, so this must not be modified.
+        """
         return self._yaml_config
 
 
 def get_config_file(c: typing.Union[str, ConfigFile, None]) -> typing.Optional[ConfigFile]:
     """
-    Checks if the given argument is a file or a configFile and returns a loaded configFile else returns None
+    Checks if the given argument is a file or a configFile and returns a loaded configFile else returns None.
+
+    If no config is given, the file pointed at by the ``FLYTECTL_CONFIG`` env var takes precedence, followed by
+    ``flytekit.config`` in the current directory, ``~/.flyte/config`` and lastly ``~/.flyte/config.yaml``.
     """
     if c is None:
-        # See if there's a config file in the current directory where Python is being run from
-        current_location_config = Path("flytekit.config")
-        if current_location_config.exists():
-            logger.info(f"Using configuration from Python process root {current_location_config.absolute()}")
-            return ConfigFile(str(current_location_config.absolute()))
-
-        # If not, see if there's a config in the user's home directory
-        home_dir_config = Path(Path.home(), ".flyte", "config")  # _default_config_file_name in main.py
-        if home_dir_config.exists():
-            logger.info(f"Using configuration from home directory {home_dir_config.absolute()}")
-            return ConfigFile(str(home_dir_config.absolute()))
-
-        # If not, see if the env var that flytectl sandbox tells the user to set is set,
-        # or see if there's something in the default home directory location
-        flytectl_path = Path(Path.home(), ".flyte", "config.yaml")
-        flytectl_path_from_env = getenv(FLYTECTL_CONFIG_ENV_VAR, None)
-
-        if flytectl_path_from_env:
-            flytectl_path = Path(flytectl_path_from_env)
-        if flytectl_path.exists():
-            logger.info(f"Using flytectl/YAML config {flytectl_path.absolute()}")
-            return ConfigFile(str(flytectl_path.absolute()))
+        # Walk the candidate locations in order of precedence and stop at the first one that exists
+        for location, source in _config_file_candidates():
+            st = _stat_or_none(location)
+            if st is not None:
+                logger.info(f"Using {source} {location}")
+                return _cached_config_file(str(location), st)
 
         # If not, then return None and let caller handle
         return None
     if isinstance(c, str):
         logger.debug(f"Using specified config file at {c}")
-        return ConfigFile(c)
+        return _load_config_file(c)
     return c
 
 
+_CWD_CONFIG = Path("flytekit.config")
+
+
+@functools.lru_cache(maxsize=None)
+def _home_configs() -> typing.Tuple[Path, Path]:
+    """
+    Returns the INI and YAML config locations in the user's home directory. Resolved on first use rather than at
+    import, as the home directory cannot always be determined (e.g. containers running as an arbitrary uid).
+    """
+    flyte_dir = Path.home() / ".flyte"
+    return flyte_dir / "config", flyte_dir / "config.yaml"  # _default_config_file_name in main.py
+
+
+def _config_file_candidates() -> typing.List[typing.Tuple[Path, str]]:
+    """
+    Returns the locations a config file is looked up at when none is specified, in order of precedence
+    #. The file pointed at by the env var that flytectl sandbox tells the user to set, if it is set
+    #. ``flytekit.config`` in the current directory where Python is being run from
+    #. ``~/.flyte/config``
+    #. ``~/.flyte/config.yaml``, only if the flytectl env var is not set
+    """
+    home_config, home_yaml_config = _home_configs()
+    candidates = [
+        (_CWD_CONFIG.absolute(), "configuration from Python process root"),
+        (home_config, "configuration from home directory"),
+    ]
+    flytectl_path_from_env = getenv(FLYTECTL_CONFIG_ENV_VAR, None)
+    if flytectl_path_from_env:
+        candidates.insert(0, (Path(flytectl_path_from_env).absolute(), "flytectl/YAML config"))
+    else:
+        candidates.append((home_yaml_config, "flytectl/YAML config"))
+    return candidates
+
+
+def _stat_or_none(p: Path) -> typing.Optional[os.stat_result]:
+    try:
+        return p.stat()
+    except OSError:
+        return None
+
+
+def _load_config_file(location: str) -> ConfigFile:
+    """
+    Returns a (possibly shared) ConfigFile for the given location. Files are only parsed again once their
+    modification time or size changes.
+    """
+    p = Path(location).absolute()
+    st = _stat_or_none(p)
+    if st is None:
+        # Let ConfigFile deal with the missing file, exactly like before
+        return ConfigFile(location)
+    return _cached_config_file(str(p), st)
+
+
+_MAX_CACHED_CONFIG_FILES = 32
+_config_files: typing.Dict[str, ConfigFile] = {}
+_config_files_lock = threading.Lock()
+
+
+def _cached_config_file(location: str, st: os.stat_result) -> ConfigFile:
+    """
+    Returns the cached ConfigFile for the location if ``st`` matches the stat it was loaded with, otherwise loads
+    the file again, reusing ``st`` so it is not stat'ed twice.
+    """
+    # The pop and re-insert below must not interleave with another thread's eviction
+    with _config_files_lock:
+        cfg = _config_files.pop(location, None)
+        if cfg is None or not cfg._matches(st):
+            cfg = ConfigFile(location, _stat=st)
+        if len(_config_files) >= _MAX_CACHED_CONFIG_FILES:
+            # Evict the least recently used location, entries are re-inserted on every hit
+            del _config_files[next(iter(_config_files))]
+        _config_files[location] = cfg
+        return cfg
+
+
 def set_if_exists(d: dict, k: str, v: typing.Any) -> dict:
     """
     Given a dict ``d`` sets the key ``k`` with value of config ``v``, if the config value ``v`` is set
@@ -275,6 +576,19 @@ def set_if_exists(d: dict, k: str, v: typing.Any) -> dict:
     return d
 
 
+def set_many_if_exists(d: dict, pairs: typing.Iterable[typing.Tuple[str, typing.Any]]) -> dict:
+    """
+    Like :py:func:`set_if_exists`, for an iterable of ``(k, v)`` pairs. Pairs are applied in order, so a later value
+    for the same key wins if it is set.
+
+    .. note::
+
+        The input dictionary ``d`` will be mutated.
+    """
+    d.update((k, v) for k, v in pairs if v)
+    return d
+
+
 def read_file_if_exists(filename: typing.Optional[str], encoding=None) -> typing.Optional[str]:
     """
     Reads the contents of the file if passed a path. Otherwise, returns None.
@@ -1,13 +1,14 @@
 import configparser
 import datetime
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 import mock
 import pytest
 from pytimeparse.timeparse import timeparse
 
-from flytekit.configuration import ConfigEntry, get_config_file, set_if_exists
-from flytekit.configuration.file import LegacyConfigEntry
+from flytekit.configuration import ConfigEntry, ConfigFile, get_config_file, set_if_exists, set_many_if_exists
+from flytekit.configuration.file import LegacyConfigEntry, _LegacyConfig, _stat_or_none
 
 
 def test_set_if_exists():
@@ -21,6 +22,13 @@ def test_set_if_exists():
     assert d["k"] == "x"
 
 
+def test_set_many_if_exists():
+    d = set_many_if_exists({}, [("a", None), ("b", []), ("c", "x"), ("d", 0), ("e", ["y"])])
+    assert d == {"c": "x", "e": ["y"]}
+    d = set_many_if_exists(d, iter([("c", "z"), ("e", None)]))
+    assert d == {"c": "z", "e": ["y"]}
+
+
 def test_get_config_file():
     c = get_config_file(None)
     assert c is None
@@ -32,6 +40,75 @@ def test_get_config_file():
         get_config_file(os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs/bad.config"))
 
 
+def test_get_config_file_discovery(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "flytekit.config").write_text("[platform]\nurl=fakeflyte.com\n")
+    c = get_config_file(None)
+    assert c.legacy_config is not None
+
+    # The flytectl env var takes precedence over the config in the current directory
+    yaml_config = tmp_path / "flytectl.yaml"
+    yaml_config.write_text("admin:\n  endpoint: dns:///flyte.mycorp.io\n")
+    monkeypatch.setenv("FLYTECTL_CONFIG", str(yaml_config))
+    c = get_config_file(None)
+    assert c.yaml_config is not None
+
+    # Unless it points to a file that does not exist
+    monkeypatch.setenv("FLYTECTL_CONFIG", str(tmp_path / "missing.yaml"))
+    c = get_config_file(None)
+    assert c.legacy_config is not None
+
+
+def test_get_config_file_is_cached(tmp_path):
+    p = tmp_path / "cached.config"
+    p.write_text("[platform]\nurl=one.com\n")
+    c = get_config_file(str(p))
+    assert get_config_file(str(p)) is c
+
+    p.write_text("[platform]\nurl=other.com\n")
+    c2 = get_config_file(str(p))
+    assert c2 is not c
+    assert c2.legacy_config.get("platform", "url") == "other.com"
+    assert not c2.is_stale()
+
+
+def test_get_config_file_stats_once(tmp_path):
+    p = tmp_path / "stat_once.config"
+    p.write_text("[platform]\nurl=one.com\n")
+    with mock.patch("flytekit.configuration.file._stat_or_none", wraps=_stat_or_none) as stat:
+        c = get_config_file(str(p))
+        assert stat.call_count == 1
+        assert get_config_file(str(p)) is c
+        assert stat.call_count == 2
+
+
+def test_get_config_file_from_many_threads(tmp_path):
+    paths = []
+    for i in range(64):
+        p = tmp_path / f"threads{i}.config"
+        p.write_text(f"[platform]\nurl={i}.com\n")
+        paths.append(str(p))
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        configs = list(pool.map(get_config_file, paths * 4))
+    assert [c.legacy_config.get("platform", "url") for c in configs] == [f"{i}.com" for i in range(64)] * 4
+
+
+def test_config_file_is_stale(tmp_path):
+    p = tmp_path / "stale.config"
+    p.write_text("[platform]\nurl=one.com\n")
+    c = ConfigFile(str(p))
+    assert not c.is_stale()
+    p.write_text("[platform]\nurl=other.com\n")
+    assert c.is_stale()
+    p.unlink()
+    assert c.is_stale()
+
+    missing = ConfigFile(str(p))
+    assert not missing.is_stale()
+    p.write_text("[platform]\nurl=one.com\n")
+    assert missing.is_stale()
+
+
 def test_config_entry_envvar():
     # Pytest feature
     c = ConfigEntry(LegacyConfigEntry("test", "op1", str))
@@ -118,3 +195,109 @@ def test_env_var_bool_transformer(mock_file_read):
 
     # The last read should've triggered the file read since now the env var is no longer set.
     assert mock_file_read.call_count == 1
+
+
+def test_config_entry_read_returns_fresh_values():
+    cfg = get_config_file(os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs/good.config"))
+    c = ConfigEntry(LegacyConfigEntry("sdk", "workflow_packages", list))
+    c.read(cfg).append("evil.module")
+    assert c.read(cfg) == ["this.module", "that.module"]
+
+    os.environ["FLYTE_SDK_WORKFLOW_PACKAGES"] = "a,b"
+    try:
+        c.read(cfg).append("evil.module")
+        assert c.read(cfg) == ["a", "b"]
+    finally:
+        del os.environ["FLYTE_SDK_WORKFLOW_PACKAGES"]
+
+
+@mock.patch("flytekit.configuration.file.LegacyConfigEntry.read_from_file")
+def test_config_entry_read_is_not_cached_above_the_file(mock_file_read):
+    mock_file_read.return_value = "from_file"
+    cfg = get_config_file(os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs/good.config"))
+    c = ConfigEntry(LegacyConfigEntry("platform", "url"))
+    assert c.read(cfg) == "from_file"
+    assert c.read(cfg) == "from_file"
+    assert mock_file_read.call_count == 2
+
+
+def test_legacy_config_matches_configparser():
+    for name in ["good.config", "images.config"]:
+        location = os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs", name)
+        cfg = get_config_file(location)
+        assert isinstance(cfg.legacy_config, _LegacyConfig)
+
+        expected = configparser.ConfigParser()
+        expected.read(location)
+        assert cfg.legacy_config.sections() == expected.sections()
+        for section in expected.sections():
+            assert cfg.legacy_config.options(section) == expected.options(section)
+            for option in expected.options(section):
+                assert cfg.legacy_config.get(section, option) == expected.get(section, option)
+
+    with pytest.raises(configparser.NoSectionError):
+        cfg.legacy_config.get("nope", "nope")
+    with pytest.raises(configparser.NoOptionError):
+        cfg.legacy_config.get("images", "nope")
+
+
+def test_legacy_config_falls_back_to_configparser(tmp_path):
+    p = tmp_path / "multiline.config"
+    p.write_text("[sdk]\nworkflow_packages=this.module,\n  that.module\n[madeup]\nstring_value: abc\n")
+    cfg = get_config_file(str(p))
+    assert isinstance(cfg.legacy_config, configparser.ConfigParser)
+    assert cfg.legacy_config.get("sdk", "workflow_packages") == "this.module,\nthat.module"
+    assert ConfigEntry(LegacyConfigEntry("madeup", "string_value")).read(cfg) == "abc"
+
+
+def test_config_entry_read_many():
+    cfg = get_config_file(os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs/good.config"))
+    entries = [
+        ConfigEntry(LegacyConfigEntry("platform", "url", str)),
+        ConfigEntry(LegacyConfigEntry("madeup", "int_value", int)),
+        ConfigEntry(LegacyConfigEntry("madeup", "does_not_exist")),
+    ]
+    assert ConfigEntry.read_many(entries, cfg) == [e.read(cfg) for e in entries] == ["fakeflyte.com", 3, None]
+
+    os.environ["FLYTE_MADEUP_INT_VALUE"] = "5"
+    try:
+        assert ConfigEntry.read_many(entries, cfg) == ["fakeflyte.com", 5, None]
+    finally:
+        del os.environ["FLYTE_MADEUP_INT_VALUE"]
+
+
+def test_legacy_read_from_file_with_explicit_none_transform():
+    cfg = get_config_file(os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs/good.config"))
+    assert LegacyConfigEntry("platform", "url").read_from_file(cfg, None) == "fakeflyte.com"
+
+
+def test_legacy_config_has_configparser_surface():
+    location = os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs", "good.config")
+    fast = get_config_file(location).legacy_config
+    assert isinstance(fast, _LegacyConfig)
+    expected = configparser.ConfigParser()
+    expected.read(location)
+
+    for cfg in [fast, expected]:
+        assert cfg.get("platform", "URL") == "fakeflyte.com"
+        assert cfg.get("platform", "nope", fallback="x") == "x"
+        assert cfg.get("nope", "nope", fallback=None) is None
+        assert cfg.get("platform", "url", vars={"URL": "override"}) == "override"
+        assert cfg.getint("madeup", "int_value") == 3
+        assert cfg.getint("madeup", "nope", fallback=7) == 7
+        assert cfg.getfloat("madeup", "int_value") == 3.0
+        assert cfg.getboolean("madeup", "bool_value") is False
+        assert cfg.getboolean("madeup", "nope", fallback=True) is True
+        assert cfg.items("platform") == [("url", "fakeflyte.com")]
+        assert [name for name, _ in cfg.items()] == ["DEFAULT"] + cfg.sections()
+        assert cfg["platform"]["URL"] == "fakeflyte.com"
+        assert dict(cfg["madeup"]) == dict(expected["madeup"])
+        assert "DEFAULT" in cfg and "platform" in cfg and "nope" not in cfg
+        assert len(cfg) == len(expected)
+        assert cfg
+        with pytest.raises(configparser.NoOptionError):
+            cfg.getint("madeup", "nope")
+        with pytest.raises(configparser.NoSectionError):
+            cfg.items("nope")
+        with pytest.raises(KeyError):
+            cfg["nope"]
@@ -1,4 +1,6 @@
+import copy
 import os
+import pickle
 
 import mock
 
@@ -58,3 +60,37 @@ def test_real_config():
 
     res = Credentials.SCOPES.read(config_file)
     assert res == ["all"]
+
+
+def test_yaml_switch_lookups():
+    config_file = get_config_file(os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs/sample.yaml"))
+    assert config_file.get(YamlConfigEntry("admin.endpoint")) == "dns:///flyte.mycorp.io"
+    assert config_file.get(YamlConfigEntry("storage.connection.access-key")) == "minio"
+    assert config_file.get(YamlConfigEntry("admin.nope")) is None
+    assert config_file.get(YamlConfigEntry("nope.nope.nope")) is None
+    assert config_file.get(YamlConfigEntry("admin"))["endpoint"] == "dns:///flyte.mycorp.io"
+
+
+def test_yaml_read_returns_fresh_values():
+    config_file = get_config_file(os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs/sample.yaml"))
+    Credentials.SCOPES.read(config_file).append("evil")
+    assert Credentials.SCOPES.read(config_file) == ["all"]
+    config_file.get(YamlConfigEntry("admin"))["endpoint"] = "mutated"
+    assert Platform.URL.read(config_file) == "flyte.mycorp.io"
+
+
+def test_yaml_config_is_a_plain_dict():
+    config_file = get_config_file(os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs/sample.yaml"))
+    assert type(config_file.yaml_config) is dict
+    assert config_file.yaml_config is config_file.yaml_config
+    assert copy.deepcopy(config_file.yaml_config) == pickle.loads(pickle.dumps(config_file.yaml_config))
+
+
+def test_read_with_explicit_none_transform():
+    config_file = get_config_file(os.path.join(os.path.dirname(os.path.realpath(__file__)), "configs/sample.yaml"))
+    assert YamlConfigEntry("admin.endpoint").read_from_file(config_file, None) == "dns:///flyte.mycorp.io"
+
+    legacy = LegacyConfigEntry("madeup", "explicit_none_transform")
+    assert legacy.read_from_env(None) is None
+    with mock.patch.dict(os.environ, {"FLYTE_MADEUP_EXPLICIT_NONE_TRANSFORM": "x"}):
+        assert legacy.read_from_env(None) == "x"